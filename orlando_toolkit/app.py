@@ -14,7 +14,6 @@ import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
-from copy import deepcopy
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -236,6 +235,14 @@ class OrlandoToolkit:
             return
 
         self.show_generation_progress()
+        self._start_generation_when_settled(save_path)
+
+    def _start_generation_when_settled(self, save_path: str) -> None:
+        # The export snapshots the structure preview, which must first reflect
+        # the depth/exclusions shown (a depth change merges in the background)
+        if self.structure_tab and not self.structure_tab.settle_preview():
+            self.root.after(50, self._start_generation_when_settled, save_path)
+            return
         threading.Thread(target=self.run_generation_thread, args=(save_path,), daemon=True).start()
 
     def show_generation_progress(self):
@@ -250,14 +257,14 @@ class OrlandoToolkit:
     def run_generation_thread(self, save_path: str):
         try:
             # Build an up-to-date context snapshot for export. We work on a
-            # background thread, so heavy deepcopy does not block the UI.
+            # background thread, so the context copy does not block the UI.
             if self.structure_tab and getattr(self.structure_tab, "context", None):
-                ctx_export = deepcopy(self.structure_tab.context)
+                ctx_export = self.structure_tab.context.clone()
                 # Preserve latest metadata (may have been edited in other tabs)
                 if self.dita_context:
                     ctx_export.metadata.update(self.dita_context.metadata)
             else:
-                ctx_export = deepcopy(self.dita_context)
+                ctx_export = self.dita_context.clone()
 
             ctx = self.service.prepare_package(ctx_export)  # type: ignore[arg-type]
             self.service.write_package(ctx, save_path)
@@ -101,12 +101,13 @@ def update_image_references_and_names(context: DitaContext) -> DitaContext:
     prefix = context.metadata.get("prefix", "IMG")
 
     # Create per-section image naming
-    from orlando_toolkit.core.utils import find_topicref_for_image, get_section_number_for_topicref
+    from orlando_toolkit.core.utils import build_image_topicref_index, get_section_number_for_topicref
     
-    # Group images by section
+    # Group images by section (one image -> topicref index for all lookups)
+    image_topicrefs = build_image_topicref_index(context)
     section_images = {}
     for image_filename in list(context.images.keys()):
-        topicref = find_topicref_for_image(image_filename, context)
+        topicref = image_topicrefs.get(image_filename)
         if topicref is not None and context.ditamap_root is not None:
             section_number = get_section_number_for_topicref(topicref, context.ditamap_root)
         else:
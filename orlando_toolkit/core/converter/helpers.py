@@ -14,7 +14,7 @@ from typing import Dict, Any, Optional, Tuple
 from lxml import etree as ET  # type: ignore
 from docx.text.paragraph import Paragraph  # type: ignore
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_COLOR_INDEX  # type: ignore
-from docx.oxml.ns import qn  # type: ignore
+from docx.oxml.ns import qn, nsmap as _DOCX_NSMAP  # type: ignore
 
 from orlando_toolkit.core.utils import (
     slugify,
@@ -23,6 +23,7 @@ from orlando_toolkit.core.utils import (
     normalize_topic_title,
 )
 from orlando_toolkit.config.manager import ConfigManager
+from orlando_toolkit.core.parser import XP_EMBED_RIDS
 
 __all__ = [
     "STYLE_MAP",
@@ -39,6 +40,13 @@ __all__ = [
 
 STYLE_MAP: Dict[str, Any] = {}
 
+# ---------------------------------------------------------------------------
+# Precompiled XPath queries (evaluated once per run/paragraph)
+# ---------------------------------------------------------------------------
+
+_XP_VERT_ALIGN = ET.XPath("./w:rPr/w:vertAlign/@w:val", namespaces={"w": _DOCX_NSMAP["w"]})
+_XP_OUTLINE_LVL = ET.XPath("./w:pPr/w:outlineLvl/@w:val", namespaces={"w": _DOCX_NSMAP["w"]})
+
 # ---------------------------------------------------------------------------
 # Wingdings/Webdings symbol normalisation
 # ---------------------------------------------------------------------------
@@ -102,8 +110,10 @@ def add_orlando_topicmeta(map_root: ET.Element, metadata: Dict[str, Any]) -> Non
     # appears when the element is present with *content="true"*.
 
     title_element = map_root.find("title")
-    insert_index = list(map_root).index(title_element) + 1 if title_element is not None else 0
-    map_root.insert(insert_index, topicmeta)
+    if title_element is not None:
+        title_element.addnext(topicmeta)
+    else:
+        map_root.insert(0, topicmeta)
 
 # ---------------------------------------------------------------------------
 # Paragraph processing helpers
@@ -305,7 +315,7 @@ def _process_paragraph_runs(p_element: ET.Element, paragraph: Paragraph, image_m
             run_format.append("underline")
         
         # New check for superscript via direct XML property
-        vert_align = run.element.xpath("./w:rPr/w:vertAlign/@w:val")
+        vert_align = _XP_VERT_ALIGN(run.element)
         if run.font.superscript or (vert_align and vert_align[0] == "superscript"):
             run_format.append("superscript")
 
@@ -357,7 +367,7 @@ def _process_paragraph_runs(p_element: ET.Element, paragraph: Paragraph, image_m
 
         # image handling ------------------------------------------------------
         if not exclude_images:
-            r_ids = run.element.xpath(".//@r:embed")
+            r_ids = XP_EMBED_RIDS(run.element)
             if r_ids and r_ids[0] in image_map:
                 img_filename = os.path.basename(image_map[r_ids[0]])
                 ET.SubElement(p_element, "image", href=f"../media/{img_filename}", id=generate_dita_id())
@@ -379,7 +389,7 @@ def process_paragraph_content_and_images(
 
     images: list[str] = []
     for run in paragraph.runs:
-        r_ids = run.element.xpath(".//@r:embed")
+        r_ids = XP_EMBED_RIDS(run.element)
         if r_ids and r_ids[0] in image_map:
             images.append(os.path.basename(image_map[r_ids[0]]))
 
@@ -426,8 +436,7 @@ def get_heading_level(paragraph: Paragraph, style_map: Optional[dict] = None) ->
             if style_name.startswith("Heading ") and style_name.split(" ")[-1].isdigit():
                 return int(style_name.split(" ")[-1])
 
-        ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-        outline_vals = paragraph._p.xpath("./w:pPr/w:outlineLvl/@w:val", namespaces=ns)
+        outline_vals = _XP_OUTLINE_LVL(paragraph._p)
         if outline_vals:
             return int(outline_vals[0]) + 1
 
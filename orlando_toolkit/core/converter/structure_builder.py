@@ -12,7 +12,7 @@ from docx.text.paragraph import Paragraph  # type: ignore
 from docx.table import Table  # type: ignore
 
 from orlando_toolkit.core.models import HeadingNode
-from orlando_toolkit.core.parser import iter_block_items
+from orlando_toolkit.core.parser import iter_block_items, XP_EMBED_RIDS
 from orlando_toolkit.core.converter.helpers import get_heading_level
 
 import uuid
@@ -309,7 +309,7 @@ def _add_content_to_topic(conbody: ET.Element, content_blocks: List, all_images_
             )
             
             text = block.text.strip()
-            is_image_para = any(run.element.xpath(".//@r:embed") for run in block.runs) and not text
+            is_image_para = any(XP_EMBED_RIDS(run.element) for run in block.runs) and not text
             
             if is_image_para:
                 current_list = None
@@ -317,7 +317,7 @@ def _add_content_to_topic(conbody: ET.Element, content_blocks: List, all_images_
                     current_sl = ET.SubElement(conbody, "sl", id=generate_dita_id())
                 sli = ET.SubElement(current_sl, "sli", id=generate_dita_id())
                 for run in block.runs:
-                    r_ids = run.element.xpath(".//@r:embed")
+                    r_ids = XP_EMBED_RIDS(run.element)
                     if r_ids and r_ids[0] in all_images_map_rid:
                         img_filename = os.path.basename(all_images_map_rid[r_ids[0]])
                         ET.SubElement(sli, "image", href=f"../media/{img_filename}", id=generate_dita_id())
@@ -6,16 +6,16 @@ This module is UI-agnostic and manipulates only the in-memory DitaContext.
 It must not perform any file I/O so that it can be reused by CLI, GUI and tests.
 """
 
-from copy import deepcopy
 from typing import Set
 from lxml import etree as ET  # type: ignore
 
 from orlando_toolkit.core.models import DitaContext  # noqa: F401
-from orlando_toolkit.core.utils import generate_dita_id, normalize_topic_title
+from orlando_toolkit.core.utils import generate_dita_id, href_filename, normalize_topic_title
 
 __all__ = [
     "merge_topics_by_titles", 
     "merge_topics_unified",
+    "append_title_paragraph",
 ]
 
 
@@ -33,7 +33,12 @@ BLOCK_LEVEL_TAGS: Set[str] = {
 
 
 def _copy_content(src_topic: ET.Element, dest_topic: ET.Element) -> None:
-    """Append block-level children from *src_topic* into *dest_topic*."""
+    """Move block-level children from *src_topic* into *dest_topic*.
+
+    Merge callers discard *src_topic* afterwards, so its block-level children
+    are re-parented by lxml rather than copied; their IDs are already unique
+    and are kept as they are.
+    """
 
     dest_body = dest_topic.find("conbody")
     if dest_body is None:
@@ -43,35 +48,8 @@ def _copy_content(src_topic: ET.Element, dest_topic: ET.Element) -> None:
     if src_body is None:
         return
 
-    for child in list(src_body):
-        if child.tag in BLOCK_LEVEL_TAGS:
-            # Shallow copy so we don't affect original
-            new_child = deepcopy(child)
-            # Ensure unique @id attributes to avoid duplicates
-            id_map = {}
-            if "id" in new_child.attrib:
-                old = new_child.get("id")
-                new = generate_dita_id()
-                new_child.set("id", new)
-                id_map[old] = new
-
-            # Also dedup nested IDs and collect mapping
-            for el in new_child.xpath('.//*[@id]'):
-                old = el.get("id")
-                new = generate_dita_id()
-                el.set("id", new)
-                id_map[old] = new
-
-            # Update internal references within the copied subtree
-            for el in new_child.xpath('.//*[@href|@conref]'):
-                for attr in ("href", "conref"):
-                    val = el.get(attr)
-                    if val and val.startswith("#"):
-                        ref = val[1:]
-                        if ref in id_map:
-                            el.set(attr, f"#{id_map[ref]}")
-            dest_body.append(new_child)
-
+    for child in [c for c in src_body if c.tag in BLOCK_LEVEL_TAGS]:
+        dest_body.append(child)
 
 
 def _clean_title(raw: str | None) -> str:
@@ -97,15 +75,13 @@ def merge_topics_by_titles(ctx: "DitaContext", exclude_titles: set[str]) -> None
     removed: Set[str] = set()
 
     def _walk(parent_ref, ancestor_topic_el):
-        for tref in list(parent_ref):
-            if tref.tag not in ("topicref", "topichead"):
-                continue
-
+        # Snapshot only the map children (filtered in C) since *parent_ref* is mutated below
+        for tref in list(parent_ref.iterchildren("topicref", "topichead")):
             href = tref.get("href")
             topic_el = None
             fname = None
             if href:
-                fname = href.split("/")[-1]
+                fname = href_filename(href)
                 topic_el = ctx.topics.get(fname)
 
             # Title to test comes from navtitle (preferred) or topic title
@@ -119,15 +95,7 @@ def merge_topics_by_titles(ctx: "DitaContext", exclude_titles: set[str]) -> None
 
             if _clean_title(title_txt) in targets and ancestor_topic_el is not None and topic_el is not None:
                 # 1) Preserve heading paragraph with bold and underline formatting
-                head_p = ET.Element("p", id=generate_dita_id())
-                bold_elem = ET.SubElement(head_p, "b", id=generate_dita_id())
-                underline_elem = ET.SubElement(bold_elem, "u", id=generate_dita_id())
-                underline_elem.text = normalize_topic_title(title_txt.strip())
-
-                parent_body = ancestor_topic_el.find("conbody")
-                if parent_body is None:
-                    parent_body = ET.SubElement(ancestor_topic_el, "conbody")
-                parent_body.append(head_p)
+                append_title_paragraph(ancestor_topic_el, title_txt.strip())
 
                 # 2) Merge body content
                 _copy_content(topic_el, ancestor_topic_el)
@@ -170,6 +138,23 @@ def _new_topic_with_title(title_text: str) -> ET.Element:
     return topic_el
 
 
+def append_title_paragraph(dest_topic: ET.Element, title_text: str) -> None:
+    """Append *title_text* to *dest_topic*'s conbody as a bold, underlined paragraph.
+
+    This is how a merged topic keeps its heading inside the topic it was merged into.
+    """
+    heading = normalize_topic_title(title_text)
+
+    dest_body = dest_topic.find("conbody")
+    if dest_body is None:
+        dest_body = ET.SubElement(dest_topic, "conbody")
+
+    head_p = ET.SubElement(dest_body, "p", id=generate_dita_id())
+    bold_elem = ET.SubElement(head_p, "b", id=generate_dita_id())
+    underline_elem = ET.SubElement(bold_elem, "u", id=generate_dita_id())
+    underline_elem.text = heading
+
+
 def _ensure_content_module(ctx: "DitaContext", section_tref: ET.Element) -> ET.Element:
     """Ensure there is a child *module* topic under *section_tref* and return its <concept> element.
 
@@ -188,7 +173,7 @@ def _ensure_content_module(ctx: "DitaContext", section_tref: ET.Element) -> ET.E
             if child_navtitle is not None and child_navtitle.text == title_txt:
                 # Found existing topic with same name - reuse it
                 child_href = child.get("href")
-                child_fname = child_href.split("/")[-1]
+                child_fname = href_filename(child_href)
                 existing_topic = ctx.topics.get(child_fname)
                 if existing_topic is not None:
                     # Update the level to match the section to prevent further merging
@@ -242,7 +227,9 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
     if ctx.ditamap_root is None:
         return
         
-    exclude_style_map = exclude_style_map or {}
+    # Freeze the exclusions once so the per-node test is a single dict probe
+    # plus a hash lookup, whatever container type the caller passed
+    exclude_style_map = {lvl: frozenset(styles) for lvl, styles in (exclude_style_map or {}).items()}
     removed_topics: Set[str] = set()
     
     # Track content modules created for each topichead to avoid duplicates
@@ -262,7 +249,7 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
             return True
             
         # Merge if style is excluded for this level
-        if t_level in exclude_style_map and style_name in exclude_style_map[t_level]:
+        if style_name in exclude_style_map.get(t_level, ()):
             return True
             
         return False
@@ -270,10 +257,8 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
     def _recurse(node: ET.Element, level: int, ancestor_topic_el: ET.Element | None, ancestor_tref: ET.Element | None = None):
         """Single-pass traversal that applies both depth and style criteria."""
         
-        for tref in list(node):
-            if tref.tag not in ("topicref", "topichead"):
-                continue
-
+        # Snapshot only the map children (filtered in C) since *node* is mutated below
+        for tref in list(node.iterchildren("topicref", "topichead")):
             t_level = int(tref.get("data-level", level))
 
             # Resolve the topic element that this topicref points to (if any)
@@ -281,7 +266,7 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
             topic_el: ET.Element | None = None
             fname = None
             if href:
-                fname = href.split("/")[-1]
+                fname = href_filename(href)
                 topic_el = ctx.topics.get(fname)
 
             # Check if this topic should be merged (unified decision)
@@ -295,16 +280,7 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
                     # Merge: preserve title and copy content to ancestor
                     title_el = topic_el.find("title")
                     if title_el is not None and title_el.text:
-                        clean_title = " ".join(title_el.text.split())
-                        head_p = ET.Element("p", id=generate_dita_id())
-                        bold_elem = ET.SubElement(head_p, "b", id=generate_dita_id())
-                        underline_elem = ET.SubElement(bold_elem, "u", id=generate_dita_id())
-                        underline_elem.text = normalize_topic_title(clean_title)
-
-                        parent_body = ancestor_topic_el.find("conbody")
-                        if parent_body is None:
-                            parent_body = ET.SubElement(ancestor_topic_el, "conbody")
-                        parent_body.append(head_p)
+                        append_title_paragraph(ancestor_topic_el, " ".join(title_el.text.split()))
 
                     _copy_content(topic_el, ancestor_topic_el)
 
@@ -350,17 +326,16 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
                                         if child_navtitle is not None:
                                             child_navtitle.text = normalize_topic_title(section_title_el.text)
                                     
-                                    # Copy section attributes to the child
-                                    for attr, value in current.attrib.items():
-                                        if attr not in ("data-level",):  # Preserve child's level
-                                            tref.set(attr, value)
+                                    # Copy section attributes to the child (preserve child's level)
+                                    tref.attrib.update(
+                                        {attr: value for attr, value in current.attrib.items() if attr != "data-level"}
+                                    )
                                     
                                     # Replace section with the promoted child in the parent
                                     section_parent = current.getparent()
                                     if section_parent is not None:
-                                        section_index = list(section_parent).index(current)
+                                        current.addnext(tref)
                                         section_parent.remove(current)
-                                        section_parent.insert(section_index, tref)
                                     
                                     # Mark that we've done a solo child promotion
                                     solo_child_promoted = True
@@ -374,7 +349,7 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
                             break
                         elif current.tag == "topicref" and current.get("href"):
                             # Found a content-bearing topicref
-                            parent_fname = current.get("href").split("/")[-1]
+                            parent_fname = href_filename(current.get("href"))
                             parent_module = ctx.topics.get(parent_fname)
                             if parent_module is not None:
                                 break
@@ -388,15 +363,7 @@ def merge_topics_unified(ctx: "DitaContext", depth_limit: int, exclude_style_map
                         # Copy title and content to the module
                         title_el = topic_el.find("title")
                         if title_el is not None and title_el.text:
-                            clean_title = " ".join(title_el.text.split())
-                            head_p = ET.Element("p", id=generate_dita_id())
-                            bold_elem = ET.SubElement(head_p, "b", id=generate_dita_id())
-                            underline_elem = ET.SubElement(bold_elem, "u", id=generate_dita_id())
-                            underline_elem.text = normalize_topic_title(clean_title)
-                            tb = parent_module.find("conbody")
-                            if tb is None:
-                                tb = ET.SubElement(parent_module, "conbody")
-                            tb.append(head_p)
+                            append_title_paragraph(parent_module, " ".join(title_el.text.split()))
 
                         _copy_content(topic_el, parent_module)
 
@@ -465,9 +432,9 @@ def _collapse_redundant_sections(ctx: "DitaContext") -> None:
         """Find topichead sections that only have one content module child."""
         collapsible = []
         
-        for topichead in node.findall(".//topichead"):
+        for topichead in node.iterdescendants("topichead"):
             # Count actual topicref children (not metadata)
-            children = [child for child in topichead if child.tag in ("topicref", "topichead")]
+            children = list(topichead.iterchildren("topicref", "topichead"))
             
             # Section is collapsible if it has exactly one child with content
             if len(children) == 1:
@@ -475,7 +442,7 @@ def _collapse_redundant_sections(ctx: "DitaContext") -> None:
                 child_href = child.get("href")
                 if child_href:
                     # Verify the child topic exists
-                    child_fname = child_href.split("/")[-1]
+                    child_fname = href_filename(child_href)
                     if child_fname in ctx.topics:
                         collapsible.append(topichead)
         
@@ -497,7 +464,7 @@ def _collapse_redundant_sections(ctx: "DitaContext") -> None:
             
         # Get the content module topic
         content_href = content_child.get("href")
-        content_fname = content_href.split("/")[-1]
+        content_fname = href_filename(content_href)
         content_topic = ctx.topics.get(content_fname)
         
         if content_topic is None:
@@ -512,15 +479,13 @@ def _collapse_redundant_sections(ctx: "DitaContext") -> None:
                 content_title_el.text = normalize_topic_title(section_navtitle.text)
         
         # Copy section attributes to content child
-        for attr, value in section_topichead.attrib.items():
-            content_child.set(attr, value)
+        content_child.attrib.update(section_topichead.attrib)
         
         # Replace section with content module in the parent
         parent = section_topichead.getparent()
         if parent is not None:
-            parent_index = list(parent).index(section_topichead)
+            section_topichead.addnext(content_child)
             parent.remove(section_topichead)
-            parent.insert(parent_index, content_child) 
 
 
 def _optimize_remaining_sections(ctx: "DitaContext", depth_limit: int) -> None:
@@ -536,23 +501,17 @@ def _optimize_remaining_sections(ctx: "DitaContext", depth_limit: int) -> None:
         sections_to_optimize = []
         
         # Collect all sections in a single pass to avoid modification during iteration
-        def _collect_sections(node):
-            for child in list(node):  # Use list() to avoid modification issues
-                if child.tag == "topichead":
-                    topic_children = [c for c in child if c.tag == "topicref" and c.get("href")]
-                    level = int(child.get("data-level", 1))
-                    
-                    if len(topic_children) == 1:
-                        # Solo child - always optimize
-                        sections_to_optimize.append(("solo", child, topic_children[0]))
-                    elif len(topic_children) > 1 and level == depth_limit:
-                        # Multi-child at target level - create content module
-                        sections_to_optimize.append(("multi", child, topic_children))
-                
-                # Recurse into child sections
-                _collect_sections(child)
-        
-        _collect_sections(ctx.ditamap_root)
+        # (C-level document-order walk, same order as a pre-order recursion)
+        for child in ctx.ditamap_root.iterdescendants("topichead"):
+            topic_children = [c for c in child.iterchildren("topicref") if c.get("href")]
+            level = int(child.get("data-level", 1))
+
+            if len(topic_children) == 1:
+                # Solo child - always optimize
+                sections_to_optimize.append(("solo", child, topic_children[0]))
+            elif len(topic_children) > 1 and level == depth_limit:
+                # Multi-child at target level - create content module
+                sections_to_optimize.append(("multi", child, topic_children))
         
         # Apply optimizations
         for opt_type, section, children in sections_to_optimize:
@@ -577,7 +536,7 @@ def _promote_solo_child_safe(ctx: "DitaContext", section: ET.Element, child: ET.
             # Update topic title
             child_href = child.get("href")
             if child_href:
-                child_fname = child_href.split("/")[-1]
+                child_fname = href_filename(child_href)
                 topic_el = ctx.topics.get(child_fname)
                 if topic_el is not None:
                     topic_title_el = topic_el.find("title")
@@ -590,15 +549,13 @@ def _promote_solo_child_safe(ctx: "DitaContext", section: ET.Element, child: ET.
                 child_navtitle.text = normalize_topic_title(section_title_el.text)
         
         # Copy section attributes to child
-        for attr, value in section.attrib.items():
-            child.set(attr, value)
+        child.attrib.update(section.attrib)
         
         # Replace section with child in parent
         parent = section.getparent()
         if parent is not None:
-            section_index = list(parent).index(section)
+            section.addnext(child)
             parent.remove(section)
-            parent.insert(section_index, child)
     except Exception:
         # If promotion fails, skip silently
         pass
@@ -614,28 +571,19 @@ def _create_content_module_safe(ctx: "DitaContext", section: ET.Element, topic_c
         for child in topic_children[:]:  # Copy list to avoid modification issues
             child_href = child.get("href")
             if child_href:
-                child_fname = child_href.split("/")[-1]
+                child_fname = href_filename(child_href)
                 topic_el = ctx.topics.get(child_fname)
                 if topic_el is not None:
                     # Copy title as paragraph with bold and underline formatting
                     title_el = topic_el.find("title")
                     if title_el is not None and title_el.text:
-                        clean_title = " ".join(title_el.text.split())
-                        head_p = ET.Element("p", id=generate_dita_id())
-                        bold_elem = ET.SubElement(head_p, "b", id=generate_dita_id())
-                        underline_elem = ET.SubElement(bold_elem, "u", id=generate_dita_id())
-                        underline_elem.text = normalize_topic_title(clean_title)
-                        
-                        content_body = content_module.find("conbody")
-                        if content_body is None:
-                            content_body = ET.SubElement(content_module, "conbody")
-                        content_body.append(head_p)
+                        append_title_paragraph(content_module, " ".join(title_el.text.split()))
                     
                     # Copy content
                     _copy_content(topic_el, content_module)
                     
                     # Remove child from section and clean up topic
-                    if child in section:
+                    if child.getparent() is section:
                         section.remove(child)
                     ctx.topics.pop(child_fname, None)
     except Exception:
@@ -653,7 +601,7 @@ def _final_cleanup_orphaned_topics(ctx: "DitaContext") -> None:
     for topicref in ctx.ditamap_root.findall('.//topicref[@href]'):
         href = topicref.get("href")
         if href:
-            fname = href.split("/")[-1]
+            fname = href_filename(href)
             referenced_topics.add(fname)
     
     # Remove unreferenced topics
@@ -6,6 +6,7 @@ This module is intentionally free of UI / I/O code so that the contained
 objects can be reused in any context (unit-tests, CLI, GUI, etc.).
 """
 
+from copy import deepcopy
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional, List
 
@@ -66,4 +67,18 @@ class DitaContext:
     ditamap_root: Optional[ET.Element] = None
     topics: Dict[str, ET.Element] = field(default_factory=dict)
     images: Dict[str, bytes] = field(default_factory=dict)
-    metadata: Dict[str, Any] = field(default_factory=dict) 
\ No newline at end of file
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def clone(self) -> "DitaContext":
+        """Return an independent copy of this context.
+
+        XML trees are duplicated with lxml's native element copy and image
+        blobs (immutable ``bytes``) are shared, which avoids running the
+        generic ``copy.deepcopy`` machinery over the whole dataclass.
+        """
+        return DitaContext(
+            ditamap_root=deepcopy(self.ditamap_root) if self.ditamap_root is not None else None,
+            topics={fname: deepcopy(topic_el) for fname, topic_el in self.topics.items()},
+            images=dict(self.images),
+            metadata=deepcopy(self.metadata),
+        )
@@ -11,7 +11,9 @@ import io
 import logging
 
 from PIL import Image
+from lxml import etree as ET  # type: ignore
 from docx.document import Document as _Document  # type: ignore
+from docx.oxml.ns import nsmap as _DOCX_NSMAP  # type: ignore
 from docx.oxml.table import CT_Tbl  # type: ignore
 from docx.oxml.text.paragraph import CT_P  # type: ignore
 from docx.table import _Cell, Table  # type: ignore
@@ -21,9 +23,14 @@ from orlando_toolkit.core.models import DitaContext
 
 logger = logging.getLogger(__name__)
 
+# Relationship ids of embedded images (r:embed) below a run or paragraph.
+# Compiled once; the converter modules import it from here.
+XP_EMBED_RIDS = ET.XPath(".//@r:embed", namespaces={"r": _DOCX_NSMAP["r"]})
+
 __all__ = [
     "iter_block_items",
     "extract_images_to_context",
+    "XP_EMBED_RIDS",
 ]
 
 
@@ -84,7 +91,7 @@ def extract_images_to_context(doc: _Document, context: DitaContext) -> Dict[str,
     for block in iter_block_items(doc):
         if isinstance(block, Paragraph):
             for run in block.runs:
-                r_ids = run.element.xpath(".//@r:embed")
+                r_ids = XP_EMBED_RIDS(run.element)
                 for r_id in r_ids:
                     if r_id in rel_data and r_id not in processed_rids:
                         processed_rids.add(r_id)
@@ -123,7 +130,7 @@ def extract_images_to_context(doc: _Document, context: DitaContext) -> Dict[str,
                     for cell_block in iter_block_items(cell):
                         if isinstance(cell_block, Paragraph):
                             for run in cell_block.runs:
-                                r_ids = run.element.xpath(".//@r:embed")
+                                r_ids = XP_EMBED_RIDS(run.element)
                                 for r_id in r_ids:
                                     if r_id in rel_data and r_id not in processed_rids:
                                         processed_rids.add(r_id)
@@ -11,6 +11,8 @@ from copy import deepcopy
 from typing import Optional
 from lxml import etree as ET  # type: ignore
 
+from orlando_toolkit.core.utils import href_filename
+
 if False:  # TYPE_CHECKING pragma
     from orlando_toolkit.core.models import DitaContext  # noqa: F401
 
@@ -30,7 +32,7 @@ def get_raw_topic_xml(ctx: "DitaContext", tref: ET.Element, *, pretty: bool = Tr
 
     href = tref.get("href")
     if href and href.startswith("topics/"):
-        topic_fname = href.split("/")[-1]
+        topic_fname = href_filename(href)
         topic_el = ctx.topics.get(topic_fname)
         if topic_el is not None:
             xml_bytes = ET.tostring(topic_el, pretty_print=pretty, encoding="utf-8")
@@ -14,7 +14,7 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 
 from orlando_toolkit.core.models import DitaContext
-from orlando_toolkit.core.utils import slugify
+from orlando_toolkit.core.utils import href_filename, slugify
 
 # Core conversion operations
 from orlando_toolkit.core.converter import (
@@ -103,7 +103,7 @@ class ConversionService:
 
             # Remove unreferenced topics (already handled in merge, but safe)
             hrefs = {
-                tref.get("href").split("/")[-1]
+                href_filename(tref.get("href"))
                 for tref in context.ditamap_root.xpath(".//topicref[@href]")
             }
             context.topics = {fn: el for fn, el in context.topics.items() if fn in hrefs}
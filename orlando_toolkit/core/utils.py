@@ -7,10 +7,10 @@ used across all layers of the toolkit.
 """
 
 from typing import Any, Optional, Dict
+import colorsys
+import os
 import re
-import uuid
 from lxml import etree as ET
-import xml.dom.minidom as _minidom
 
 if False:  # TYPE_CHECKING pragma
     from orlando_toolkit.core.models import DitaContext
@@ -19,15 +19,21 @@ __all__ = [
     "slugify",
     "generate_dita_id",
     "normalize_topic_title",
+    "href_filename",
     "save_xml_file",
     "save_minified_xml_file",
     "convert_color_to_outputclass",
     "calculate_section_numbers",
     "get_section_number_for_topicref",
+    "build_image_topicref_index",
     "find_topicref_for_image",
 ]
 
 
+_SLUG_CLEAN_RX = re.compile(r"[^\w\s-]")
+_SLUG_SPACE_RX = re.compile(r"[-\s]+")
+
+
 def slugify(text: str) -> str:
     """Return a file-system-safe slug version of *text*.
 
@@ -35,13 +41,24 @@ def slugify(text: str) -> str:
     and lower-cases the result. Mirrors previous implementation from
     ``docx_to_dita_converter`` for backward compatibility.
     """
-    text = re.sub(r"[^\w\s-]", "", text).strip().lower()
-    return re.sub(r"[-\s]+", "_", text)
+    text = _SLUG_CLEAN_RX.sub("", text).strip().lower()
+    return _SLUG_SPACE_RX.sub("_", text)
+
+
+def _format_dita_id(raw: bytes) -> str:
+    """Format 16 random bytes as ``id-`` followed by UUID-style dashed hex."""
+    h = raw.hex()
+    return f"id-{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 
 def generate_dita_id() -> str:
-    """Generate a globally unique ID suitable for DITA elements."""
-    return f"id-{uuid.uuid4()}"
+    """Generate a globally unique ID suitable for DITA elements.
+
+    The ID carries 128 random bits from ``os.urandom`` and keeps the dashed
+    layout of the former ``uuid4`` based IDs, without the overhead of building
+    a :class:`uuid.UUID` object per call.
+    """
+    return _format_dita_id(os.urandom(16))
 
 
 def normalize_topic_title(title: str) -> str:
@@ -65,6 +82,11 @@ def normalize_topic_title(title: str) -> str:
     return title.upper()
 
 
+def href_filename(href: str) -> str:
+    """Return the topic file name referenced by *href* (text after the last ``/``)."""
+    return href.rpartition("/")[2]
+
+
 # ---------------------------------------------------------------------------
 # XML convenience wrappers
 # ---------------------------------------------------------------------------
@@ -104,12 +126,11 @@ def save_xml_file(element: ET.Element, path: str, doctype_str: str, *, pretty: b
 def save_minified_xml_file(element: ET.Element, path: str, doctype_str: str) -> None:
     """Save *element* on a single line (minified) to *path*.
 
-    This reproduces the logic previously embedded in the converter.
+    lxml serialises without indentation when ``pretty_print`` is off, so the
+    element is written as-is rather than round-tripped through minidom.
     """
 
-    xml_bytes = ET.tostring(element, encoding="UTF-8")
-    dom = _minidom.parseString(xml_bytes)
-    minified_content = dom.documentElement.toxml() if dom.documentElement else ""
+    minified_content = ET.tostring(element, encoding="UTF-8", with_tail=False).decode("utf-8")
 
     full = f'<?xml version="1.0" encoding="UTF-8"?>{doctype_str}{minified_content}'
     with open(path, "w", encoding="utf-8") as fh:
@@ -120,6 +141,14 @@ def save_minified_xml_file(element: ET.Element, path: str, doctype_str: str) ->
 # Colour mapping utilities (extracted from original converter)  [p3c]
 # ---------------------------------------------------------------------------
 
+def _hue_in_range(h_deg: float, hrange: list[int] | tuple[int, int] | None) -> bool:
+    """Return True when *h_deg* lies within the inclusive [start, end] *hrange*."""
+    if not hrange:
+        return False
+    start, end = hrange
+    return start <= h_deg <= end
+
+
 def convert_color_to_outputclass(
     color_value: Optional[str], color_rules: Dict[str, Any]
 ) -> Optional[str]:
@@ -154,11 +183,11 @@ def convert_color_to_outputclass(
     tolerance_cfg = color_rules.get("tolerance", {})
     if color_lower.startswith("#") and len(color_lower) == 7 and tolerance_cfg:
         try:
-            r = int(color_lower[1:3], 16) / 255.0
-            g = int(color_lower[3:5], 16) / 255.0
-            b = int(color_lower[5:7], 16) / 255.0
-
-            import colorsys
+            # Decode all three channels in one C call (ValueError on bad hex)
+            r8, g8, b8 = bytes.fromhex(color_lower[1:])
+            r = r8 / 255.0
+            g = g8 / 255.0
+            b = b8 / 255.0
 
             h, s, v = colorsys.rgb_to_hsv(r, g, b)
             h_deg = h * 360
@@ -172,14 +201,8 @@ def convert_color_to_outputclass(
                 sat_min = spec.get("sat_min", 0)
                 val_min = spec.get("val_min", 0)
 
-                def _in_range(hrange: list[int] | tuple[int, int] | None) -> bool:
-                    if not hrange:
-                        return False
-                    start, end = hrange
-                    return start <= h_deg <= end
-
                 if (
-                    (_in_range(hue_range) or _in_range(hue2_range))
+                    (_hue_in_range(h_deg, hue_range) or _hue_in_range(h_deg, hue2_range))
                     and s_pct >= sat_min
                     and v_pct >= val_min
                 ):
@@ -193,6 +216,9 @@ def convert_color_to_outputclass(
 # Section numbering utilities
 # ---------------------------------------------------------------------------
 
+# Map elements that take part in section numbering
+_MAP_TAGS = frozenset(("topicref", "topichead"))
+
 def calculate_section_numbers(ditamap_root: ET.Element) -> Dict[ET.Element, str]:
     """Calculate hierarchical section numbers for all topicref/topichead elements.
     
@@ -206,29 +232,31 @@ def calculate_section_numbers(ditamap_root: ET.Element) -> Dict[ET.Element, str]
     Dict[ET.Element, str]
         Mapping from topicref/topichead elements to their section numbers (e.g., "1.2.1")
     """
-    section_map = {}
-    
-    def _walk_elements(parent_element: ET.Element, counters: list[int]):
-        """Recursively walk the element tree and assign section numbers."""
-        current_level = len(counters)
-        child_counter = 0
-        
-        for element in parent_element:
-            if element.tag in ("topicref", "topichead"):
-                child_counter += 1
-                
-                # Extend counters if needed for this level
-                level_counters = counters.copy() + [child_counter]
-                
-                # Generate section number string
-                section_number = ".".join(str(c) for c in level_counters)
-                section_map[element] = section_number
-                
-                # Recursively process children
-                _walk_elements(element, level_counters)
-    
-    # Start with empty counters for root level
-    _walk_elements(ditamap_root, [])
+    section_map: Dict[ET.Element, str] = {}
+
+    # Iterative pre-order walk. Each stack level keeps its child iterator, a
+    # running sibling counter and the dotted prefix of its parent, so a
+    # number is built by appending one component instead of re-joining the
+    # whole path for every element.
+    child_iters = [ditamap_root.iterchildren(*_MAP_TAGS)]
+    counters = [0]
+    prefixes = [""]
+    while child_iters:
+        element = next(child_iters[-1], None)
+        if element is None:
+            child_iters.pop()
+            counters.pop()
+            prefixes.pop()
+            continue
+
+        counters[-1] += 1
+        section_number = f"{prefixes[-1]}{counters[-1]}"
+        section_map[element] = section_number
+
+        child_iters.append(element.iterchildren(*_MAP_TAGS))
+        counters.append(0)
+        prefixes.append(section_number + ".")
+
     return section_map
 
 
@@ -247,8 +275,60 @@ def get_section_number_for_topicref(topicref: ET.Element, ditamap_root: ET.Eleme
     str
         Section number (e.g., "1.2.1") or "0" if not found
     """
-    section_map = calculate_section_numbers(ditamap_root)
-    return section_map.get(topicref, "0")
+    # Walk up from *topicref* instead of numbering the whole map: each level
+    # contributes its position among the preceding topicref/topichead siblings
+    parts: list[str] = []
+    element = topicref
+    while element is not ditamap_root:
+        parent = element.getparent()
+        if parent is None or element.tag not in _MAP_TAGS:
+            return "0"
+        parts.append(str(1 + sum(1 for _ in element.itersiblings(*_MAP_TAGS, preceding=True))))
+        element = parent
+
+    return ".".join(reversed(parts)) if parts else "0"
+
+
+def build_image_topicref_index(context: "DitaContext") -> Dict[str, ET.Element]:
+    """Map every image filename to the topicref of the first topic that shows it.
+
+    Topics are visited in ``context.topics`` order and, for each file, the first
+    topicref in document order pointing at it is used, so each entry matches
+    what :func:`find_topicref_for_image` returns for that image. Building the
+    index walks the map and every topic once; callers resolving many images
+    should build it once and look images up in the returned dict.
+
+    Parameters
+    ----------
+    context
+        The DITA context containing topics and ditamap
+
+    Returns
+    -------
+    Dict[str, ET.Element]
+        Mapping from image filename (relative to ``media/``) to its topicref
+    """
+    index: Dict[str, ET.Element] = {}
+    if context.ditamap_root is None:
+        return index
+
+    topicrefs_by_file: Dict[str, ET.Element] = {}
+    for topicref in context.ditamap_root.iter("topicref"):
+        href = topicref.get("href")
+        if href:
+            topicrefs_by_file.setdefault(href_filename(href), topicref)
+
+    media_prefix = "../media/"
+    for topic_filename, topic_element in context.topics.items():
+        topicref = topicrefs_by_file.get(topic_filename)
+        if topicref is None:
+            continue
+        for image in topic_element.iter("image"):
+            href = image.get("href", "")
+            if href.startswith(media_prefix):
+                index.setdefault(href[len(media_prefix):], topicref)
+
+    return index
 
 
 def find_topicref_for_image(image_filename: str, context: "DitaContext") -> Optional[ET.Element]:
@@ -266,18 +346,4 @@ def find_topicref_for_image(image_filename: str, context: "DitaContext") -> Opti
     Optional[ET.Element]
         The topicref element containing the image, or None if not found
     """
-    if not context.ditamap_root:
-        return None
-    
-    # Search through all topics to find which one contains the image
-    for topic_filename, topic_element in context.topics.items():
-        # Look for image references in the topic
-        image_elements = topic_element.xpath(f".//image[@href='../media/{image_filename}']")
-        if image_elements:
-            # Find the corresponding topicref in the ditamap
-            for topicref in context.ditamap_root.xpath(".//topicref"):
-                href = topicref.get("href", "")
-                if href.endswith(topic_filename):
-                    return topicref
-    
-    return None 
\ No newline at end of file
+    return build_image_topicref_index(context).get(image_filename)
@@ -155,15 +155,16 @@ class ImageTab(ttk.Frame):
         if not self.context or not self.context.ditamap_root:
             return {}
         
-        from orlando_toolkit.core.utils import find_topicref_for_image, get_section_number_for_topicref
+        from orlando_toolkit.core.utils import build_image_topicref_index, get_section_number_for_topicref
         
         prefix = self.context.metadata.get("prefix", "")
         manual_code = self.context.metadata.get("manual_code", "")
         
         # Group images by section
+        image_topicrefs = build_image_topicref_index(self.context)
         section_images = {}
         for image_filename in self.context.images.keys():
-            topicref = find_topicref_for_image(image_filename, self.context)
+            topicref = image_topicrefs.get(image_filename)
             if topicref is not None:
                 section_number = get_section_number_for_topicref(topicref, self.context.ditamap_root)
             else:
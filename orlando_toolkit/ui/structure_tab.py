@@ -8,19 +8,69 @@ and preview the resulting topic hierarchy extracted from the current
 
 from __future__ import annotations
 
+from collections import OrderedDict, deque
 from typing import Optional
-import copy
+import queue
+import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk
 from lxml import etree as ET
 from orlando_toolkit.ui.dialogs import CenteredDialog
-from orlando_toolkit.core.utils import normalize_topic_title
+from orlando_toolkit.core.utils import href_filename, normalize_topic_title
 
 if False:  # TYPE_CHECKING pragma
     from orlando_toolkit.core.models import DitaContext
 
 __all__ = ["StructureTab"]
 
+# Shared empty default for exclusion lookups (avoids a fresh set() per miss)
+_EMPTY: frozenset = frozenset()
+
+# Tcl lambda inserting a flat (parent, id, text, ...) list of rows into a
+# treeview, each item already open; the rows travel as one Tcl list object,
+# so titles are never re-parsed as script and the whole preview is built in
+# a single call
+_TCL_BULK_INSERT = (
+    "{tree rows} {foreach {parent id text} $rows {$tree insert $parent end -id $id -text $text -open 1}}"
+)
+
+# Compiled once; the href is bound as an XPath variable, so it needs no
+# quoting and the expression is not re-parsed for every journal entry
+_XP_TREF_BY_HREF = ET.XPath(".//topicref[@href=$href]")
+
+# Maximum number of ditamap snapshots kept on each of the undo/redo stacks
+_UNDO_LIMIT = 100
+
+# Repeated moves of the same selection in the same direction within this
+# many seconds form a single undo step
+_UNDO_COALESCE_S = 0.5
+
+# Quiet period after the last depth spinbox click before the preview is re-merged
+_DEPTH_DEBOUNCE_MS = 250
+
+# Number of recent merge results kept for reuse when a depth/filter combination recurs
+_MERGE_CACHE_SIZE = 4
+
+# Interval at which finished background merges are picked up on the Tk thread
+_MERGE_POLL_MS = 50
+
+
+class _Edit:
+    """Structural edit recorded in the journal for replay after a re-merge.
+
+    *arg* carries the op-specific value: the direction of a ``move``, the
+    new title of a ``rename`` or the target href of a ``merge``.
+    """
+
+    __slots__ = ("op", "href", "arg")
+
+    def __init__(self, op: str, href: str, arg: str | None = None):
+        self.op = op
+        self.href = href
+        self.arg = arg
+
 
 class StructureTab(ttk.Frame):
     """A tab that lets the user configure topic depth and preview structure."""
@@ -84,9 +134,31 @@ class StructureTab(ttk.Frame):
         # Internal search state
         self._search_matches: list[str] = []  # tree item IDs
         self._search_index: int = -1
+        self._search_term: str = ""
+        # Lower-cased display title per tree item, filled while the preview is built
+        self._search_titles: dict[str, str] = {}
 
         # Excluded styles state
         self._excluded_styles: dict[int, set[str]] = {}
+        # Metadata form of the above; see _serialized_exclusions
+        self._exclude_map_cached: dict[str, list[str]] | None = None
+
+        # Headings of the pristine map (level -> style -> titles) and the
+        # ditamap root they were collected from; see _collect_headings
+        self._heading_cache: dict[int, dict[str, list[str]]] = {}
+        self._heading_cache_root: ET.Element | None = None
+
+        # Depth the current preview was last merged at (None until first merge)
+        self._merged_depth: int | None = None
+        # Pending debounced depth refresh (Tk "after" id)
+        self._depth_after_id: str | None = None
+        # Recent merge results: key -> (pristine metadata snapshot, merged context)
+        self._merge_cache: OrderedDict[tuple, tuple[dict, "DitaContext"]] = OrderedDict()
+        # Background merges post (generation, ...) here; only the latest generation is applied
+        self._merge_results: queue.Queue = queue.Queue()
+        self._merge_generation: int = 0
+        self._merge_poll_id: str | None = None
+        self._merge_pending: bool = False
 
         # Remember geometry of auxiliary dialogs for consistent placement
         self._filter_geom: str | None = None
@@ -99,8 +171,6 @@ class StructureTab(ttk.Frame):
         self.tree = ttk.Treeview(preview_frame, show="tree", selectmode="extended")
         self.tree.pack(side="left", expand=True, fill="both")
 
-        # Prevent collapsing: re-open any item that tries to close
-        self.tree.bind("<<TreeviewClose>>", self._on_close_attempt)
         self.tree.bind("<<TreeviewSelect>>", self._update_toolbar_state)
         self.tree.bind("<Double-1>", self._on_item_preview)
         self.tree.bind("<Button-3>", self._on_right_click)  # Right-click context menu
@@ -109,12 +179,15 @@ class StructureTab(ttk.Frame):
         self.bind_all("<Control-z>", self._undo)
         self.bind_all("<Control-y>", self._redo)
 
-        # Undo/redo stacks
-        self._undo_stack: list[bytes] = []
-        self._redo_stack: list[bytes] = []
+        # Undo/redo stacks (bounded: the oldest snapshot drops off when full)
+        self._undo_stack: deque[bytes] = deque(maxlen=_UNDO_LIMIT)
+        self._redo_stack: deque[bytes] = deque(maxlen=_UNDO_LIMIT)
+        # Group and time of the last snapshot push, for coalescing bursts
+        self._undo_group: tuple | None = None
+        self._undo_group_ts: float = 0.0
 
         # Journal of structural edits so they can be replayed after depth rebuild
-        self._edit_journal: list[dict] = []
+        self._edit_journal: list[_Edit] = []
 
         yscroll = ttk.Scrollbar(preview_frame, orient="vertical", command=self.tree.yview)
         yscroll.pack(side="right", fill="y")
@@ -123,10 +196,22 @@ class StructureTab(ttk.Frame):
         self.tree.configure(yscrollcommand=yscroll.set)
 
         def _on_shift_wheel(event):
-            self.tree.xview_scroll(int(-1 * (event.delta / 120)), "units")
+            if event.num == 4:
+                step = -1
+            elif event.num == 5:
+                step = 1
+            elif sys.platform == "darwin":
+                # macOS reports small deltas (not multiples of 120)
+                step = -event.delta
+            else:
+                step = int(-1 * (event.delta / 120))
+            self.tree.xview_scroll(step, "units")
             return "break"
 
         self.tree.bind("<Shift-MouseWheel>", _on_shift_wheel)
+        # X11 reports the wheel as buttons 4/5 instead of <MouseWheel>
+        self.tree.bind("<Shift-Button-4>", _on_shift_wheel)
+        self.tree.bind("<Shift-Button-5>", _on_shift_wheel)
 
     # ------------------------------------------------------------------
     # Public API
@@ -137,13 +222,23 @@ class StructureTab(ttk.Frame):
         self._main_context = context  # Original object owned by main app
 
         # Deep-copies for safe preview/undo operations
-        self._orig_context = copy.deepcopy(context)
-        self.context = copy.deepcopy(context)
+        self._orig_context = context.clone()
+        self.context = context.clone()
         self._depth_var.set(int(context.metadata.get("topic_depth", 3)))
         self._merge_enabled_var.set(True)
+        self._merged_depth = None
+        self._merge_cache.clear()
+        # A debounced spin from the previous document must not merge this one
+        if self._depth_after_id is not None:
+            self.after_cancel(self._depth_after_id)
+            self._depth_after_id = None
+        # Results of merges still running for the previous context are ignored
+        self._merge_generation += 1
+        self._stop_progress()
 
         # Restore previously excluded style map if present
         self._excluded_styles = {int(k): set(v) for k, v in context.metadata.get("exclude_style_map", {}).items()}
+        self._exclude_map_cached = None
 
         # Force realtime_merge flag
         context.metadata["realtime_merge"] = True
@@ -159,6 +254,18 @@ class StructureTab(ttk.Frame):
         # Ensure original context retains realtime flag
         self._orig_context.metadata.setdefault("realtime_merge", True)
 
+    def settle_preview(self) -> bool:
+        """Apply any debounced depth change now; return True once ``context`` is settled.
+
+        While a background merge is running ``context`` still reflects the
+        previous depth/exclusions, so callers snapshotting it for export
+        should retry until this returns True.
+        """
+        if self._depth_after_id is not None:
+            self.after_cancel(self._depth_after_id)
+            self._apply_depth_change()
+        return not self._merge_pending
+
     # ------------------------------------------------------------------
     # Internals
     # ------------------------------------------------------------------
@@ -172,19 +279,12 @@ class StructureTab(ttk.Frame):
 
         # Reset caches ---------------------------------------------------
         self._item_map = {}
-
-        # Build heading cache from the *original* context so excluded styles remain visible
-        self._heading_cache = {}
-        source_root = getattr(self, "_orig_context", self.context).ditamap_root if hasattr(self, "_orig_context") else None
-        if source_root is not None:
-            for tref in source_root.xpath(".//topicref|.//topichead"):
-                lvl = int(tref.get("data-level", 1))
-                style_name = tref.get("data-style", f"Heading {lvl}")
-                nav = tref.find("topicmeta/navtitle")
-                title = nav.text.strip() if nav is not None and nav.text else "(untitled)"
-                self._heading_cache.setdefault(lvl, {}).setdefault(style_name, []).append(title)
-        else:
-            self._heading_cache = {}
+        # Reverse of _item_map (lxml elements hash by identity, as in section_numbers)
+        self._tref_to_item = {}
+        self._search_titles = {}
+        self._search_term = ""
+        self._search_matches = []
+        self._search_index = -1
 
         # Calculate section numbers for display
         from orlando_toolkit.core.utils import calculate_section_numbers
@@ -194,7 +294,9 @@ class StructureTab(ttk.Frame):
             return " ".join(txt.split())
 
         def _add_topicref(node: ET.Element, level: int, parent_id=""):
-            for tref in [el for el in list(node) if el.tag in ("topicref", "topichead")]:
+            # The walk never mutates the map, so iterate lxml's filtered child
+            # iterator directly instead of materialising a list per node
+            for tref in node.iterchildren("topicref", "topichead"):
                 t_level = int(tref.get("data-level", level))
                 if t_level > max_depth:
                     continue
@@ -209,16 +311,20 @@ class StructureTab(ttk.Frame):
                 else:
                     display_title = title
                 
-                item_id = self.tree.insert(parent_id, "end", text=display_title)
+                item_id = f"t{len(self._item_map)}"
+                rows.extend((parent_id, item_id, display_title))
                 self._item_map[item_id] = tref
+                self._tref_to_item[tref] = item_id
+                self._search_titles[item_id] = display_title.lower()
                 _add_topicref(tref, t_level + 1, item_id)
 
+        # Rows are collected first and inserted (open, so the hierarchy is
+        # fully visible) with one Tcl call rather than one Python -> Tcl
+        # round-trip per item
+        rows: list[str] = []
         _add_topicref(self.context.ditamap_root, 1)
-
-        # Expand everything so the hierarchy is fully visible
-        for itm in self.tree.get_children(""):
-            self.tree.item(itm, open=True)
-            self._expand_all(itm)
+        if rows:
+            self.tree.tk.call("apply", _TCL_BULK_INSERT, str(self.tree), tuple(rows))
 
         self._update_toolbar_state()
 
@@ -227,7 +333,6 @@ class StructureTab(ttk.Frame):
     # ------------------------------------------------------------------
 
     def _on_depth_spin(self):
-        # Live preview of depth change (local, does not trigger re-parse)
         new_depth = int(self._depth_var.get())
         if self.context:
             self.context.metadata["topic_depth"] = new_depth
@@ -237,6 +342,34 @@ class StructureTab(ttk.Frame):
                 self._orig_context.metadata["topic_depth"] = new_depth
             if hasattr(self, "_main_context") and self._main_context:
                 self._main_context.metadata["topic_depth"] = new_depth
+
+        # Coalesce rapid clicks (or a held arrow): only the depth shown once
+        # the clicks settle is merged, instead of one merge per step
+        if self._depth_after_id is not None:
+            self.after_cancel(self._depth_after_id)
+        self._depth_after_id = self.after(_DEPTH_DEBOUNCE_MS, self._apply_depth_change)
+
+    def _apply_depth_change(self):
+        self._depth_after_id = None
+        # Live preview of depth change (local, does not trigger re-parse)
+        new_depth = int(self._depth_var.get())
+        if self.context:
+            # Spinbox arrows fire even when clamped at a bound; the preview is
+            # already merged at this depth so skip the copy + merge pipeline
+            if new_depth == self._merged_depth:
+                return
+            # No heading is deeper than the document's deepest level, so every
+            # depth past it merges to the same structure: only the metadata
+            # needs updating when moving between such depths
+            same_result = False
+            if self._merged_depth is not None and not self._merge_pending:
+                beyond = max(self._collect_headings(), default=0) + 1
+                same_result = min(new_depth, beyond) == min(self._merged_depth, beyond)
+            if same_result:
+                # Exporter re-merges when merged_depth differs from topic_depth
+                self.context.metadata["merged_depth"] = new_depth
+                self._merged_depth = new_depth
+                return
             self._maybe_merge_and_refresh()
 
     def _on_merge_toggle(self):
@@ -256,52 +389,122 @@ class StructureTab(ttk.Frame):
         if self.context is None:
             return
 
+        depth_limit = int(self._depth_var.get())
+        # Any merge still running was started for older parameters
+        self._merge_generation += 1
+        self._merged_depth = depth_limit
+
         # Always start from pristine copy to allow depth increases
-        if hasattr(self, "_orig_context"):
-            self.context = copy.deepcopy(self._orig_context)
+        orig = getattr(self, "_orig_context", None)
+        cache_key = None
+        meta_snapshot = None
+        if orig is not None:
+            # Merging is deterministic in the pristine map/topics (held by
+            # identity; edits replace them) and the merge parameters, so a
+            # recurring combination reuses its earlier result
+            cache_key = (
+                depth_limit,
+                frozenset((lvl, frozenset(styles)) for lvl, styles in self._excluded_styles.items()),
+                orig.ditamap_root,
+                tuple(orig.topics.items()),
+            )
+            cached = self._merge_cache.get(cache_key)
+            if cached is not None and cached[0] == orig.metadata:
+                self._merge_cache.move_to_end(cache_key)
+                self._stop_progress()
+                self.context = cached[1].clone()
+                self._replay_edits()
+                self._rebuild_preview()
+                return
+            import copy as _cpy
+            meta_snapshot = _cpy.deepcopy(orig.metadata)
+            work = orig.clone()
+        else:
+            work = self.context.clone()
 
-        depth_limit = int(self._depth_var.get())
         realtime = True
-        self.context.metadata["realtime_merge"] = realtime
+        work.metadata["realtime_merge"] = realtime
 
         # Persist heading exclusions
-        if self._excluded_styles:
-            self.context.metadata["exclude_style_map"] = {str(k): list(v) for k, v in self._excluded_styles.items()}
+        serialized = self._serialized_exclusions()
+        if serialized is not None:
+            work.metadata["exclude_style_map"] = serialized
         else:
-            self.context.metadata.pop("exclude_style_map", None)
+            work.metadata.pop("exclude_style_map", None)
+
+        # The merge only touches the private ``work`` clone, so it runs on a
+        # worker thread while the preview keeps showing the current context;
+        # the result is swapped in on the Tk thread by ``_poll_merge_results``
+        from orlando_toolkit.core.merge import merge_topics_unified
+        generation = self._merge_generation
+        excluded = {lvl: set(styles) for lvl, styles in self._excluded_styles.items()}
+
+        def _worker():
+            try:
+                merge_topics_unified(work, depth_limit, excluded)
+                # ``work`` is still private here, so the cache copy is taken
+                # off the Tk thread too, before edits are replayed onto it
+                cached = work.clone() if cache_key is not None else None
+            except Exception as exc:
+                self._merge_results.put((generation, work, cache_key, meta_snapshot, None, exc))
+            else:
+                self._merge_results.put((generation, work, cache_key, meta_snapshot, cached, None))
+
+        self._merge_pending = True
+        self._update_toolbar_state()
+        self._progress.grid()
+        self._progress.start()
+        threading.Thread(target=_worker, daemon=True).start()
+        if self._merge_poll_id is None:
+            self._merge_poll_id = self.after(_MERGE_POLL_MS, self._poll_merge_results)
+
+    def _poll_merge_results(self):
+        """Apply the result of the latest background merge once it is ready."""
+        self._merge_poll_id = None
+        latest = None
+        while True:
+            try:
+                result = self._merge_results.get_nowait()
+            except queue.Empty:
+                break
+            if result[0] == self._merge_generation:
+                latest = result
+
+        if latest is None:
+            # Keep polling while the current merge is still running
+            if self._merge_pending:
+                self._merge_poll_id = self.after(_MERGE_POLL_MS, self._poll_merge_results)
+            return
 
-        if realtime:
-            self._progress.grid()
-            self._progress.start()
-            self.update_idletasks()
+        _gen, work, cache_key, meta_snapshot, cached, error = latest
+        self._stop_progress()
+        if error is not None:
+            # Nothing was merged at the dispatched depth; let it be retried
+            self._merged_depth = None
+            raise error
 
-            # Use unified merge function to handle both depth and style criteria in single pass
-            from orlando_toolkit.core.merge import merge_topics_unified
-            merge_topics_unified(self.context, depth_limit, self._excluded_styles)
+        if cache_key is not None:
+            self._merge_cache[cache_key] = (meta_snapshot, cached)
+            while len(self._merge_cache) > _MERGE_CACHE_SIZE:
+                self._merge_cache.popitem(last=False)
 
-            self._progress.stop()
-            self._progress.grid_remove()
+        self.context = work
 
         # Replay structural edits on refreshed context
         self._replay_edits()
 
         self._rebuild_preview()
 
+    def _stop_progress(self):
+        self._merge_pending = False
+        self._progress.stop()
+        self._progress.grid_remove()
+        self._update_toolbar_state()
+
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
 
-    def _expand_all(self, item):
-        for child in self.tree.get_children(item):
-            self.tree.item(child, open=True)
-            self._expand_all(child)
-
-    def _on_close_attempt(self, event):
-        item = self.tree.focus()
-        if item:
-            self.tree.item(item, open=True)
-        return "break"
-
     def _on_item_preview(self, event):
         item = self.tree.focus()
         if not item or item not in self._item_map:
@@ -345,7 +548,9 @@ class StructureTab(ttk.Frame):
     def _update_toolbar_state(self, event=None):
         """Enable/disable toolbar buttons based on current selection."""
         sel = self.tree.selection()
-        enabled = len(sel) > 0
+        # Edits are blocked while a background merge is pending: they would
+        # act on (and snapshot) the map that its result is about to replace
+        enabled = len(sel) > 0 and not self._merge_pending
         for btn in (self._btn_up, self._btn_down, self._btn_left, self._btn_right):
             btn.config(state="normal" if enabled else "disabled")
 
@@ -353,9 +558,9 @@ class StructureTab(ttk.Frame):
         """Handle right-click context menu on tree items."""
         import tkinter as tk
         
-        # Identify clicked item
+        # Identify clicked item (no edit menu while a merge is pending)
         item = self.tree.identify_row(event.y)
-        if not item:
+        if not item or self._merge_pending:
             return
         
         # Select the clicked item if not already selected
@@ -367,8 +572,13 @@ class StructureTab(ttk.Frame):
         if not selected_items:
             return
         
-        # Create context menu
-        context_menu = tk.Menu(self, tearoff=0)
+        # One menu widget is reused for every click (a fresh tk.Menu per
+        # click was never destroyed); only its entries are rebuilt
+        context_menu = getattr(self, "_context_menu", None)
+        if context_menu is None:
+            context_menu = self._context_menu = tk.Menu(self, tearoff=0)
+        else:
+            context_menu.delete(0, "end")
         
         # Add info section for single selection
         if len(selected_items) == 1:
@@ -429,6 +639,9 @@ class StructureTab(ttk.Frame):
 
     def _rename_selected(self):
         """Rename the selected topic."""
+        # The preview is about to be replaced by a background merge result
+        if self._merge_pending:
+            return
         selected = list(self.tree.selection())
         if len(selected) != 1:
             return
@@ -471,7 +684,7 @@ class StructureTab(ttk.Frame):
                 # Update topic XML title if this is a topicref with content
                 href = tref.get("href")
                 if href:
-                    topic_filename = href.split("/")[-1]
+                    topic_filename = href_filename(href)
                     topic_el = self.context.topics.get(topic_filename)
                     if topic_el is not None:
                         title_el = topic_el.find("title")
@@ -491,7 +704,7 @@ class StructureTab(ttk.Frame):
                 self._restore_selection([tref])
                 
                 # Record rename in journal
-                self._edit_journal.append({"op": "rename", "href": href or "", "new_title": new_title})
+                self._edit_journal.append(_Edit("rename", href or "", new_title))
                 
             dlg.destroy()
         
@@ -506,6 +719,9 @@ class StructureTab(ttk.Frame):
 
     def _delete_selected_with_confirmation(self):
         """Delete selected topics with confirmation dialog."""
+        # The preview is about to be replaced by a background merge result
+        if self._merge_pending:
+            return
         selected = list(self.tree.selection())
         if not selected:
             return
@@ -565,7 +781,7 @@ class StructureTab(ttk.Frame):
             # Remove from topics if it has an href
             href = tref.get("href")
             if href:
-                topic_filename = href.split("/")[-1]
+                topic_filename = href_filename(href)
                 self.context.topics.pop(topic_filename, None)
         
         if changed:
@@ -579,10 +795,13 @@ class StructureTab(ttk.Frame):
             # Record deletions in journal
             for tref in removed_trefs:
                 href = tref.get("href", "")
-                self._edit_journal.append({"op": "delete", "href": href})
+                self._edit_journal.append(_Edit("delete", href))
 
     def _merge_selected(self):
         """Merge multiple selected topics into the first one."""
+        # The preview is about to be replaced by a background merge result
+        if self._merge_pending:
+            return
         selected = list(self.tree.selection())
         if len(selected) < 2:
             return
@@ -610,7 +829,7 @@ class StructureTab(ttk.Frame):
         if not target_href:
             return
         
-        target_filename = target_href.split("/")[-1]
+        target_filename = href_filename(target_href)
         target_topic = self.context.topics.get(target_filename)
         if target_topic is None:
             return
@@ -622,7 +841,7 @@ class StructureTab(ttk.Frame):
             if not source_href:
                 continue
             
-            source_filename = source_href.split("/")[-1]
+            source_filename = href_filename(source_href)
             source_topic = self.context.topics.get(source_filename)
             if source_topic is None:
                 continue
@@ -651,7 +870,7 @@ class StructureTab(ttk.Frame):
             # Record merges in journal
             for tref in removed_trefs:
                 href = tref.get("href", "")
-                self._edit_journal.append({"op": "merge", "href": href, "target": target_href})
+                self._edit_journal.append(_Edit("merge", href, target_href))
 
     def _copy_content_with_title(self, source_topic, target_topic):
         """Copy content from source to target topic, preserving source title as emphasized text."""
@@ -668,11 +887,8 @@ class StructureTab(ttk.Frame):
         
         # Add source title as emphasized text with bold and underline formatting
         if source_title_el is not None and source_title_el.text:
-            title_p = ET.Element("p", id=generate_dita_id())
-            title_b = ET.SubElement(title_p, "b", id=generate_dita_id())
-            title_u = ET.SubElement(title_b, "u", id=generate_dita_id())
-            title_u.text = normalize_topic_title(source_title_el.text.strip())
-            target_body.append(title_p)
+            from orlando_toolkit.core.merge import append_title_paragraph
+            append_title_paragraph(target_topic, source_title_el.text.strip())
         
         # Copy all content from source body
         if source_body is not None:
@@ -684,12 +900,11 @@ class StructureTab(ttk.Frame):
                     # Deep copy and ensure unique IDs
                     new_child = deepcopy(child)
                     
-                    # Regenerate IDs to avoid duplicates
-                    if "id" in new_child.attrib:
-                        new_child.set("id", generate_dita_id())
-                    
-                    for el in new_child.xpath('.//*[@id]'):
-                        el.set("id", generate_dita_id())
+                    # Regenerate IDs to avoid duplicates (one C-level walk
+                    # covering the copied root and its descendants)
+                    for el in new_child.iter(ET.Element):
+                        if "id" in el.attrib:
+                            el.set("id", generate_dita_id())
                     
                     target_body.append(new_child)
 
@@ -702,15 +917,20 @@ class StructureTab(ttk.Frame):
             """Recursively adjust data-level on *tref_el* and its descendants."""
             new_lvl = max(1, int(tref_el.get("data-level", 1)) + delta)
             tref_el.set("data-level", str(new_lvl))
-            for child in tref_el.xpath('.//topicref|.//topichead'):
+            for child in tref_el.iterdescendants("topicref", "topichead"):
                 _shift_levels(child, delta)
 
+        if self._merge_pending:
+            return
         selected = list(self.tree.selection())
         if not selected:
             return
 
-        # Snapshot for undo
-        self._push_undo_snapshot()
+        # Snapshot for undo (clicking the same arrow repeatedly on the same
+        # selection is undone in one step)
+        self._push_undo_snapshot(
+            group=(direction, frozenset(self._item_map.get(sel) for sel in selected))
+        )
 
         changed = False
         selected_trefs: list[ET.Element] = []
@@ -722,7 +942,7 @@ class StructureTab(ttk.Frame):
             if tref is None or tref.getparent() is None:
                 continue
             parent = tref.getparent()
-            idx = list(parent).index(tref)
+            idx = parent.index(tref)
             by_parent.setdefault(parent, []).append((idx, tref))
 
         # Process each parent group separately
@@ -737,18 +957,19 @@ class StructureTab(ttk.Frame):
 
             if direction in ("up", "down"):
                 for idx, tref in forward_iter:
-                    sibs = list(parent)
-                    cur_idx = sibs.index(tref)
-                    if direction == "up" and cur_idx > 0:
-                        parent.remove(tref)
-                        parent.insert(cur_idx - 1, tref)
-                        changed = True
-                        selected_trefs.append(tref)
-                    elif direction == "down" and cur_idx < len(sibs) - 1:
-                        parent.remove(tref)
-                        parent.insert(cur_idx + 1, tref)
-                        changed = True
-                        selected_trefs.append(tref)
+                    # Swap with the adjacent sibling in place (no child-list scan)
+                    if direction == "up":
+                        sibling = tref.getprevious()
+                        if sibling is not None:
+                            sibling.addprevious(tref)
+                            changed = True
+                            selected_trefs.append(tref)
+                    else:
+                        sibling = tref.getnext()
+                        if sibling is not None:
+                            sibling.addnext(tref)
+                            changed = True
+                            selected_trefs.append(tref)
             elif direction == "promote":
                 # Skip processing - we'll handle promotion globally after all groups are collected
                 pass
@@ -785,7 +1006,7 @@ class StructureTab(ttk.Frame):
             parent_positions = []
             for parent_group in by_parent.keys():
                 if parent_group.getparent() is not None:
-                    pos = list(parent_group.getparent()).index(parent_group)
+                    pos = parent_group.getparent().index(parent_group)
                     parent_positions.append((pos, parent_group))
                 else:
                     parent_positions.append((0, parent_group))
@@ -801,14 +1022,14 @@ class StructureTab(ttk.Frame):
             
             # Build global parent-child map within the selection
             selected_set = set(all_selected_elements)
+            # Look upwards from each selected element (one getparent() call)
+            # instead of scanning every descendant of every selected element;
+            # children of one parent are contiguous and index-ordered here
             parent_child_map = {}
             for tref in all_selected_elements:
-                children = []
-                for child in tref.xpath('.//topicref|.//topichead'):
-                    if child in selected_set and child.getparent() == tref:
-                        children.append(child)
-                if children:
-                    parent_child_map[tref] = children
+                tref_parent = tref.getparent()
+                if tref_parent in selected_set:
+                    parent_child_map.setdefault(tref_parent, []).append(tref)
             
             # Find root elements (selected elements that don't have selected parents)
             root_elements = []
@@ -817,22 +1038,24 @@ class StructureTab(ttk.Frame):
                 if tref_parent not in selected_set:
                     root_elements.append(tref)
             
-            def promote_element_and_children(element, target_parent, target_pos):
-                """Promote an element and its selected children recursively."""
-                # Remove from current parent
-                current_parent = element.getparent()
-                if current_parent is not None:
-                    current_parent.remove(element)
-                
-                # Insert at target position
-                target_parent.insert(target_pos, element)
+            def promote_element_and_children(element, after=None, target_parent=None):
+                """Promote an element and its selected children recursively.
+
+                *element* is moved right after the sibling *after*, or to the
+                end of *target_parent* when no anchor is given.
+                """
+                # lxml re-parents the element, so no explicit remove is needed
+                if after is not None:
+                    after.addnext(element)
+                else:
+                    target_parent.append(element)
                 
                 # Adjust this element's level
                 current_level = int(element.get("data-level", 1))
                 element.set("data-level", str(max(1, current_level - 1)))
                 
                 # Adjust non-selected descendants
-                for descendant in element.xpath('.//topicref|.//topichead'):
+                for descendant in element.iterdescendants("topicref", "topichead"):
                     if descendant not in selected_set:
                         desc_level = int(descendant.get("data-level", 1))
                         descendant.set("data-level", str(max(1, desc_level - 1)))
@@ -847,7 +1070,7 @@ class StructureTab(ttk.Frame):
                         # Recursively handle child's selected descendants
                         if child in parent_child_map:
                             for grandchild in parent_child_map[child]:
-                                promote_element_and_children(grandchild, child, len(list(child)))
+                                promote_element_and_children(grandchild, target_parent=child)
                 
                 return 1  # Return number of elements inserted
             
@@ -866,7 +1089,7 @@ class StructureTab(ttk.Frame):
             for original_parent in elements_by_original_parent.keys():
                 grand = original_parent.getparent()
                 if grand is not None:
-                    pos = list(grand).index(original_parent)
+                    pos = grand.index(original_parent)
                     sorted_parent_groups.append((pos, original_parent))
             
             sorted_parent_groups.sort(key=lambda x: x[0])
@@ -875,13 +1098,12 @@ class StructureTab(ttk.Frame):
                 elements_to_promote = elements_by_original_parent[original_parent]
                 grand = original_parent.getparent()
                 if grand is not None:
-                    # Find insertion position after the original parent
-                    insert_pos = list(grand).index(original_parent) + 1
-                    
-                    # Promote elements in their original order within the parent
+                    # Promote elements in their original order, the first right
+                    # after the original parent and each next one after the last
+                    anchor = original_parent
                     for root_elem in elements_to_promote:
-                        promote_element_and_children(root_elem, grand, insert_pos)
-                        insert_pos += 1  # Next element goes after this one
+                        promote_element_and_children(root_elem, after=anchor)
+                        anchor = root_elem
                         changed = True
                         selected_trefs.append(root_elem)
             
@@ -902,7 +1124,7 @@ class StructureTab(ttk.Frame):
             # Record move in journal
             for tref in selected_trefs:
                 href = tref.get("href", "")
-                self._edit_journal.append({"op": "move", "href": href, "dir": direction})
+                self._edit_journal.append(_Edit("move", href, direction))
 
 
 
@@ -917,14 +1139,29 @@ class StructureTab(ttk.Frame):
             return _ET.tostring(self.context.ditamap_root)
         return b""
 
-    def _push_undo_snapshot(self):
+    def _push_undo_snapshot(self, group: tuple | None = None):
+        # Snapshots are taken *before* an edit, so continuing a burst keeps
+        # the snapshot from before its first edit rather than adding one
+        now = time.monotonic()
+        coalesce = group is not None and group == self._undo_group and now - self._undo_group_ts < _UNDO_COALESCE_S
+        self._undo_group = group
+        self._undo_group_ts = now
+        if coalesce and self._undo_stack:
+            self._redo_stack.clear()
+            return
+
         snap = self._snapshot()
         if snap:
-            self._undo_stack.append(snap)
+            # An action that changed nothing since the last snapshot (e.g. a
+            # move with no room to move) must not add a duplicate undo step
+            if not self._undo_stack or self._undo_stack[-1] != snap:
+                self._undo_stack.append(snap)
             self._redo_stack.clear()
 
     def _undo(self, event=None):
-        if not self._undo_stack:
+        self._undo_group = None
+        # Snapshots belong to the map the pending merge result will replace
+        if self._merge_pending or not self._undo_stack:
             return "break"
         snap = self._undo_stack.pop()
         if snap:
@@ -936,7 +1173,8 @@ class StructureTab(ttk.Frame):
         return "break"
 
     def _redo(self, event=None):
-        if not self._redo_stack:
+        self._undo_group = None
+        if self._merge_pending or not self._redo_stack:
             return "break"
         snap = self._redo_stack.pop()
         if snap:
@@ -958,10 +1196,7 @@ class StructureTab(ttk.Frame):
 
     def _restore_selection(self, tref_list):
         # Reselect items corresponding to trefs after rebuild
-        sel_items = []
-        for item, tref in self._item_map.items():
-            if tref in tref_list:
-                sel_items.append(item)
+        sel_items = [self._tref_to_item[tref] for tref in tref_list if tref in self._tref_to_item]
         self.tree.selection_set(sel_items)
         if sel_items:
             self.tree.focus(sel_items[0])
@@ -973,48 +1208,55 @@ class StructureTab(ttk.Frame):
     def _find_tref_by_href(self, root: ET.Element, href: str):
         if not href:
             return None
-        return root.xpath(f'.//topicref[@href="{href}"]')
+        return _XP_TREF_BY_HREF(root, href=href)
 
     def _replay_edits(self):
         if self.context is None or self.context.ditamap_root is None:
             return
         root = self.context.ditamap_root
+
+        # Index topicrefs by href once (first in document order wins, like the
+        # XPath lookup) instead of searching the whole map for every entry
+        href_map: dict[str, ET.Element] = {}
+        for tref in root.iter("topicref"):
+            tref_href = tref.get("href")
+            if tref_href:
+                href_map.setdefault(tref_href, tref)
+
         for rec in self._edit_journal:
-            op = rec.get("op")
-            href = rec.get("href", "")
-            matches = self._find_tref_by_href(root, href)
-            if not matches:
-                continue
-            tref = matches[0]
+            op = rec.op
+            href = rec.href
+            tref = href_map.get(href) if href else None
+            if tref is None or tref.get("href") != href or root not in tref.iterancestors():
+                # Stale entry (removed or converted by an earlier replayed edit)
+                matches = self._find_tref_by_href(root, href)
+                if not matches:
+                    continue
+                tref = href_map[href] = matches[0]
             if op == "delete":
                 parent = tref.getparent()
                 if parent is not None:
                     parent.remove(tref)
             elif op == "move":
-                direction = rec.get("dir")
+                direction = rec.arg
                 parent = tref.getparent()
                 if parent is None:
                     continue
-                siblings = list(parent)
-                idx = siblings.index(tref)
-                if direction == "up" and idx > 0:
-                    parent.remove(tref)
-                    parent.insert(idx - 1, tref)
-                elif direction == "down" and idx < len(siblings) - 1:
-                    parent.remove(tref)
-                    parent.insert(idx + 1, tref)
+                prev_sib = tref.getprevious()
+                next_sib = tref.getnext()
+                if direction == "up" and prev_sib is not None:
+                    prev_sib.addprevious(tref)
+                elif direction == "down" and next_sib is not None:
+                    next_sib.addnext(tref)
                 elif direction == "promote" and parent.tag == "topicref":
-                    grand = parent.getparent()
-                    if grand is not None:
-                        pidx = list(grand).index(parent)
-                        parent.remove(tref)
-                        grand.insert(pidx + 1, tref)
-                elif direction == "demote" and idx > 0:
+                    if parent.getparent() is not None:
+                        parent.addnext(tref)
+                elif direction == "demote" and prev_sib is not None:
                     # NEW LOGIC: Convert the topic itself to a section
                     if tref.tag == "topicref" and tref.get("href"):
                         self._convert_topic_to_section(tref)
             elif op == "rename":
-                new_title = rec.get("new_title", "")
+                new_title = rec.arg
                 if new_title:
                     # Update navtitle in ditamap
                     navtitle_el = tref.find("topicmeta/navtitle")
@@ -1023,7 +1265,7 @@ class StructureTab(ttk.Frame):
                     
                     # Update topic XML title if it has content
                     if href:
-                        topic_filename = href.split("/")[-1]
+                        topic_filename = href_filename(href)
                         topic_el = self.context.topics.get(topic_filename)
                         if topic_el is not None:
                             title_el = topic_el.find("title")
@@ -1036,15 +1278,18 @@ class StructureTab(ttk.Frame):
 
     def _on_search_change(self, event=None):
         term = self._search_var.get().strip().lower()
-        self._search_matches.clear()
+        prev_term, prev_matches = self._search_term, self._search_matches
+        self._search_term = term
+        self._search_matches = []
         self._search_index = -1
         if not term:
             return
 
-        for item_id, tref in self._item_map.items():
-            title = self.tree.item(item_id, "text").lower()
-            if term in title:
-                self._search_matches.append(item_id)
+        # Match against the titles cached at insert time (no Tk round-trip per
+        # item); when the term only grew, narrowing the previous matches suffices
+        titles = self._search_titles
+        candidates = prev_matches if prev_term and term.startswith(prev_term) else titles
+        self._search_matches = [item_id for item_id in candidates if term in titles[item_id]]
 
         self._search_nav(1)
 
@@ -1062,8 +1307,69 @@ class StructureTab(ttk.Frame):
     # ------------------------------------------------------------------
 
     def _collect_headings(self):
-        """Return cached heading dict built during preview rebuild."""
-        return getattr(self, "_heading_cache", {})
+        """Return the heading dict of the pristine map, built on first use.
+
+        Collected from the *original* context so excluded styles remain
+        visible. Edits replace the pristine ditamap root rather than mutate
+        it, so the cache is only rebuilt when that root changes.
+        """
+        orig = getattr(self, "_orig_context", None)
+        source_root = orig.ditamap_root if orig is not None else None
+        if source_root is None:
+            return {}
+        if source_root is not self._heading_cache_root:
+            cache: dict[int, dict[str, list[str]]] = {}
+            for tref in source_root.iterdescendants("topicref", "topichead"):
+                lvl = int(tref.get("data-level", 1))
+                style_name = tref.get("data-style", f"Heading {lvl}")
+                nav = tref.find("topicmeta/navtitle")
+                title = nav.text.strip() if nav is not None and nav.text else "(untitled)"
+                cache.setdefault(lvl, {}).setdefault(style_name, []).append(title)
+            self._heading_cache = cache
+            self._heading_cache_root = source_root
+        return self._heading_cache
+
+    def _serialized_exclusions(self) -> dict[str, list[str]] | None:
+        """Return the exclusions in their ``exclude_style_map`` form (None if empty).
+
+        The dict is rebuilt only after the exclusions change and is shared by
+        every context's metadata, which only ever reads it.
+        """
+        if not self._excluded_styles:
+            return None
+        if self._exclude_map_cached is None:
+            self._exclude_map_cached = {str(k): list(v) for k, v in self._excluded_styles.items()}
+        return self._exclude_map_cached
+
+    def _toggle_excluded_style(self, lvl: int, style_name: str) -> bool:
+        """Flip the exclusion of *style_name* at *lvl* and re-merge the preview.
+
+        Returns True when the style is included (not excluded) afterwards.
+        """
+        excluded = self._excluded_styles.get(lvl, set())
+        if style_name in excluded:
+            excluded.discard(style_name)
+            if not excluded:
+                self._excluded_styles.pop(lvl)
+            included = True
+        else:
+            self._excluded_styles.setdefault(lvl, set()).add(style_name)
+            included = False
+        self._exclude_map_cached = None
+
+        # Sync metadata in all contexts
+        serialized = self._serialized_exclusions()
+        for ctx in (self.context, getattr(self, "_orig_context", None), getattr(self, "_main_context", None)):
+            if ctx is None:
+                continue
+            if serialized is not None:
+                ctx.metadata["exclude_style_map"] = serialized
+            else:
+                ctx.metadata.pop("exclude_style_map", None)
+            ctx.metadata.pop("merged_exclude_styles", None)
+
+        self._maybe_merge_and_refresh()
+        return included
 
     def _open_heading_filter(self):
         headings = self._collect_headings()
@@ -1077,22 +1383,21 @@ class StructureTab(ttk.Frame):
         paned.pack(fill="both", expand=True)
 
         # ---------------- Left: checklist -----------------
+        # A single Treeview instead of a Frame/Checkbutton/Label per style:
+        # Tk only draws the visible rows and no widget is created per style.
+        # Level rows hold the styles; the "include" column shows the state.
         left_frm = ttk.Frame(paned)
         paned.add(left_frm, weight=1)
 
-        canvas = tk.Canvas(left_frm, highlightthickness=0)
-        vscroll = ttk.Scrollbar(left_frm, orient="vertical", command=canvas.yview)
-        canvas.configure(yscrollcommand=vscroll.set)
+        style_tree = ttk.Treeview(left_frm, columns=("include",), show="tree", selectmode="browse")
+        vscroll = ttk.Scrollbar(left_frm, orient="vertical", command=style_tree.yview)
+        style_tree.configure(yscrollcommand=vscroll.set)
+        style_tree.column("#0", stretch=True)
+        style_tree.column("include", width=30, minwidth=30, stretch=False, anchor="center")
+        style_tree.tag_configure("level", font=("Arial", 10, "bold"))
 
-        canvas.pack(side="left", fill="both", expand=True)
+        style_tree.pack(side="left", fill="both", expand=True)
         vscroll.pack(side="right", fill="y")
-        frame = ttk.Frame(canvas)
-        canvas.create_window((0, 0), window=frame, anchor="nw")
-
-        def _on_frame_config(event=None):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-
-        frame.bind("<Configure>", _on_frame_config)
 
         # ---------------- Right: occurrence list ----------------
         right_frm = ttk.Frame(paned)
@@ -1107,72 +1412,55 @@ class StructureTab(ttk.Frame):
         occ_list.pack(side="left", fill="both", expand=True, padx=(5, 0), pady=5)
         occ_scroll.pack(side="right", fill="y", pady=5)
 
-        row_idx = 0
-        vars_map = {}
+        # Style row item -> (level, style name)
+        row_keys: dict[str, tuple[int, str]] = {}
         for lvl in sorted(headings.keys()):
             styles_dict = headings[lvl]
-            # Label for level
-            lvl_lbl = ttk.Label(frame, text=f"Level {lvl}", font=("Arial", 10, "bold"))
-            lvl_lbl.grid(row=row_idx, column=0, sticky="w", padx=5, pady=(6, 2))
-            row_idx += 1
+            # Row for level
+            lvl_item = style_tree.insert("", "end", text=f"Level {lvl}", open=True, tags=("level",))
+            excluded_here = self._excluded_styles.get(lvl, _EMPTY)
 
             for style_name, titles in sorted(styles_dict.items()):
-                row_frm = ttk.Frame(frame)
-                row_frm.grid(row=row_idx, column=0, sticky="w", padx=15, pady=1)
-
-                key = (lvl, style_name)
-                var = tk.BooleanVar(value=(style_name not in getattr(self, "_excluded_styles", {}).get(lvl, set())))
-
-                def _on_toggle(l=lvl, s=style_name, v=var):
-                    # update exclusion map
-                    if v.get():
-                        if l in self._excluded_styles and s in self._excluded_styles[l]:
-                            self._excluded_styles[l].discard(s)
-                            if not self._excluded_styles[l]:
-                                self._excluded_styles.pop(l)
-                    else:
-                        self._excluded_styles.setdefault(l, set()).add(s)
-
-                    # Sync metadata in all contexts
-                    for ctx in (self.context, getattr(self, "_orig_context", None), getattr(self, "_main_context", None)):
-                        if ctx is None:
-                            continue
-                        if self._excluded_styles:
-                            ctx.metadata["exclude_style_map"] = {str(k): list(v) for k, v in self._excluded_styles.items()}
-                        else:
-                            ctx.metadata.pop("exclude_style_map", None)
-                        ctx.metadata.pop("merged_exclude_styles", None)
-
-                    self._maybe_merge_and_refresh()
-
-                titles_copy = list(titles)  # local copy for closure
-
-                def _on_select(event, lst=titles_copy, sty=style_name):
-                    # Ignore clicks that originate on the Checkbutton itself
-                    if isinstance(event.widget, tk.Checkbutton):
-                        return
-                    occ_list.delete(0, "end")
-                    occ_lbl.config(text=f"Occurrences – {sty}")
-                    for t in lst:
-                        occ_list.insert("end", t)
-
-                chk = ttk.Checkbutton(row_frm, variable=var, command=_on_toggle, width=2)
-                chk.pack(side="left", anchor="w")
-
-                lbl = ttk.Label(row_frm, text=f"{style_name} ({len(titles)})")
-                lbl.pack(side="left", anchor="w")
-
-                lbl.bind("<Button-1>", _on_select)
-
-                vars_map[key] = var
-                row_idx += 1
-
-        # Mouse wheel scrolling when pointer over left list
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-        # Bind to canvas only, not globally, to avoid dangling callbacks after dialog closes
-        canvas.bind("<MouseWheel>", _on_mousewheel)
+                included = style_name not in excluded_here
+                item = style_tree.insert(
+                    lvl_item,
+                    "end",
+                    text=f"{style_name} ({len(titles)})",
+                    values=("☑" if included else "☐",),
+                )
+                row_keys[item] = (lvl, style_name)
+
+        def _on_toggle(item):
+            included = self._toggle_excluded_style(*row_keys[item])
+            style_tree.set(item, "include", "☑" if included else "☐")
+
+        def _on_select(_event):
+            sel = style_tree.selection()
+            if not sel or sel[0] not in row_keys:
+                return
+            l, s = row_keys[sel[0]]
+            occ_list.delete(0, "end")
+            occ_lbl.config(text=f"Occurrences – {s}")
+            # One variadic insert instead of one Tcl call per title
+            occ_list.insert("end", *headings[l][s])
+
+        def _on_click(event):
+            # A click in the include column toggles the style
+            item = style_tree.identify_row(event.y)
+            if item in row_keys and style_tree.identify_column(event.x) == "#1":
+                _on_toggle(item)
+
+        def _on_key(_event):
+            # Level rows keep the default keys (Return opens/closes them)
+            item = style_tree.focus()
+            if item in row_keys:
+                _on_toggle(item)
+                return "break"
+
+        style_tree.bind("<<TreeviewSelect>>", _on_select)
+        style_tree.bind("<ButtonRelease-1>", _on_click)
+        style_tree.bind("<space>", _on_key)
+        style_tree.bind("<Return>", _on_key)
 
     # ------------------------------------------------------------------
     # Context sync helper
@@ -1193,7 +1481,7 @@ class StructureTab(ttk.Frame):
             return  # Already a section or no content to preserve
         
         href = topicref.get("href")
-        topic_filename = href.split("/")[-1]
+        topic_filename = href_filename(href)
         
         # Get the original topic content (if it exists)
         original_topic = self.context.topics.get(topic_filename) if self.context else None